@@ -43,11 +43,114 @@ country_entities = {
     'Finland': ['FI_PERSONAL_IDENTITY_CODE']
 }
 
-allowed_extensions = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'docx', 'tif', 'doc'}
+allowed_extensions = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'docx', 'tif', 'tiff', 'gif', 'doc'}
 dataframe_columns = ['File Name', 'text']
 poppler_path = r"C:\poppler-23.01.0\Library\bin"
 pytesserct_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
+# OCR execution settings for ReadFiles
+# ocr_backend: "thread" runs PaddleOCR on a thread pool, "process" gives every worker process its own PaddleOCR
+ocr_backend = "thread"
+# Images collected from all files of one file_reader call are recognized in batches of up to
+# ocr_batch_size images, or whatever is pending after ocr_batch_wait seconds (batch size 1 disables batching)
+ocr_batch_size = 16
+ocr_batch_wait = 0.02
+# Embedded images with fewer pixels than this (icons, bullets, rules) are not OCRed
+ocr_min_image_pixels = 64 * 64
+# Recognized lines scoring below ocr_drop_score are discarded (PaddleOCR's own TextSystem default)
+ocr_drop_score = 0.5
+# Supported paddleocr releases, [min, max): the OCR code calls the TextSystem detector, classifier and
+# recognizer directly, which 2.7.0.3 through 2.9.x expose unchanged; 3.x replaced them. Pin: paddleocr>=2.7.0.3,<3.0
+paddleocr_versions = ("2.7.0.3", "3.0")
+
+# Per-page PDF strategy: pages with at least pdf_native_text_min_chars of native text skip OCR; pages whose
+# images cover pdf_scan_coverage of the page are rendered (long side ~pdf_raster_target_pixels, clamped to
+# the DPI range, then capped at the scan's own resolution) and OCRed in place of their native text; other
+# low-text pages OCR their images
+pdf_native_text_min_chars = 200
+pdf_scan_coverage = 0.5
+pdf_raster_target_pixels = 2500
+pdf_raster_min_dpi = 150
+pdf_raster_max_dpi = 300
+# Sharded PDF mode: PDFs with at least pdf_shard_min_pages pages are read by pdf_shard_workers worker
+# processes, each with its own document handle, in page ranges submitted as the stream_page_window advances
+# (0 or 1 disables sharding)
+pdf_shard_workers = 0
+pdf_shard_min_pages = 200
+
+# Pages (or chunks) in flight per document when streaming extraction results
+stream_page_window = 8
+
+# Text files: encoding is sniffed from the first txt_sniff_bytes, then the file is decoded in chunks of
+# txt_chunk_chars; streamed detection chunks repeat the last txt_chunk_overlap_chars of the previous chunk
+txt_sniff_bytes = 64 * 1024
+txt_chunk_chars = 256 * 1024
+txt_chunk_overlap_chars = 256
+
+# OCR quality mode: "fast" skips the angle classifier, "accurate" always runs it, "balanced" runs the fast pass
+# and re-runs only images whose mean recognition confidence is below ocr_escalation_confidence or whose median
+# text height is below ocr_min_text_height pixels (tiny text is upscaled for the second pass)
+ocr_modes = ("fast", "balanced", "accurate")
+ocr_mode = "balanced"
+ocr_escalation_confidence = 0.85
+ocr_min_text_height = 16
+
+# Image preprocessing ahead of OCR: EXIF orientation, downscale to ocr_target_dpi (when the image records its DPI)
+# and to ocr_max_long_side pixels (never below ocr_min_scale), grayscale, one deskew pass within
+# +/-ocr_deskew_max_angle degrees, then overlapping tiles for anything still larger than ocr_tile_size.
+# Keep ocr_max_long_side <= ocr_tile_size so only images the ocr_min_scale floor kept large are tiled;
+# neighbouring tiles overlap by exactly ocr_tile_overlap pixels (keep it above the tallest text line)
+ocr_preprocess = True
+ocr_target_dpi = 300
+ocr_max_long_side = 2000
+ocr_min_scale = 0.5
+ocr_deskew_max_angle = 10
+ocr_deskew_min_angle = 0.5
+ocr_tile_size = 2000
+ocr_tile_overlap = 128
+
+# PII analysis of long texts: texts over pii_chunk_chars are split into chunks overlapping by
+# pii_chunk_overlap_chars (keep it above the longest entity) and analyzed on pii_analysis_workers processes
+# (0 or 1 analyzes the chunks in process). Every worker loads its own spaCy model and recognizers, about
+# pii_analysis_worker_mb each (measure the USS of one worker for the configured model), so the worker count
+# is also capped by the CPU count and by pii_analysis_memory_mb / pii_analysis_worker_mb
+pii_chunk_chars = 100000
+pii_chunk_overlap_chars = 500
+pii_analysis_workers = 2
+pii_analysis_worker_mb = 800
+pii_analysis_memory_mb = 2048
+# Skip the spaCy NER model when every requested entity comes from pattern recognizers
+pii_regex_fast_path = True
+# Run spaCy without the components the selected entities do not need (tagger and lemmatizer when no
+# selected recognizer has context words, components after NER that Presidio ignores), timing each pipeline
+# variant (ParsePii.nlp_stats). Skipping the parser before NER also saves its time but lets entities
+# span sentence boundaries, so it is opt-in.
+pii_pipeline_trimming = True
+pii_pipeline_skip_parser = False
+# Batch analysis (ParsePii.extract_batch): documents per nlp.pipe batch and nlp.pipe processes
+pii_nlp_batch_size = 16
+pii_nlp_n_process = 1
+
+# Admission control shared by all requests: files open at once, concurrent native text/parse/render jobs,
+# concurrent OCR runs, and the budget of decoded image bytes in memory (images wait when it is exhausted)
+max_concurrent_files = 16
+max_concurrent_native_jobs = os.cpu_count() or 4
+max_concurrent_ocr_jobs = 8
+max_decoded_image_bytes = 1024 * 1024 * 1024
+
+# Pre-fork serving: with prefork_workers > 1 the Presidio analyzer (spaCy model and recognizers) is loaded once
+# in a master process and that many uvicorn workers are forked from it, sharing the model memory copy-on-write
+# (0 or 1 runs a single process). PaddleOCR is loaded by each worker after the fork: OpenMP/MKL thread pools do
+# not survive fork(). A master that never starts a native thread pool is required, so pre-fork mode runs with
+# every variable of prefork_thread_env set (fast_main restarts itself with the unset ones at 1): one native
+# thread per worker, parallelism comes from the workers. Export other values before launch to override.
+prefork_workers = 0
+prefork_thread_env = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Content-addressed cache of extracted text (SHA-256 of file bytes + extractor version/settings)
+extraction_cache_enabled = True
+extraction_cache_max_bytes = 512 * 1024 * 1024
+
 # Updated and improved regex patterns
 regex_for_in_phone_number = r'(?:\+91[\s\-]?)?(?:0)?[6-9]\d{9}\b'
 regex_for_credit_card = r'(?<!\d)(?:4[0-9]{3}[ \-]?[0-9]{4}[ \-]?[0-9]{4}[ \-]?[0-9]{4}|5[1-5][0-9]{2}[ \-]?[0-9]{4}[ \-]?[0-9]{4}[ \-]?[0-9]{4}|3[47][0-9]{2}[ \-]?[0-9]{6}[ \-]?[0-9]{5}|3(?:0[0-5]|[68][0-9])[ \-]?[0-9]{6}[ \-]?[0-9]{4}|6(?:011|5[0-9]{2})[ \-]?[0-9]{4}[ \-]?[0-9]{4}[ \-]?[0-9]{4}|(?:2131|1800|35\d{3})[ \-]?\d{11})(?!\d)'
@@ -91,6 +194,8 @@ os.makedirs(watermarked_output_folder, exist_ok=True)
 header_output_folder = os.path.join(base_dir, "..", "..", "header_output_files")
 os.makedirs(header_output_folder, exist_ok=True)
 
+extraction_cache_folder = os.path.join(base_dir, "..", "..", "extraction_cache")
+
 entities_list = global_entities + [entity for entities in country_entities.values() for entity in entities] + custom_entities
 
 def delete_folder_files(path, new_dir: bool, formats: tuple = None):
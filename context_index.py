@@ -0,0 +1,190 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+from presidio_analyzer import RecognizerResult
+from presidio_analyzer.context_aware_enhancers import ContextAwareEnhancer, LemmaContextAwareEnhancer
+import copy
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords: one pass over a string finds every keyword
+    it contains, however many keywords there are.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        # The empty keyword occurs in every string
+        self._always = {""} if "" in keywords else set()
+        for keyword in keywords:
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                state = self._goto[state][char]
+            self._output[state].add(keyword)
+
+        # Breadth-first failure links; each state also reports the keywords of its failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find(self, text):
+        """Set of keywords occurring anywhere in text."""
+        found = set(self._always)
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found |= self._output[state]
+        return found
+
+
+class IndexedContextEnhancer(LemmaContextAwareEnhancer):
+    """
+    LemmaContextAwareEnhancer that indexes each document's context keywords once instead of searching
+    token windows per result.
+
+    For every analyzed text the token positions of the lemmatized keywords are collected in one pass,
+    and each distinct keyword is run once through an Aho-Corasick automaton of all recognizer context
+    words. A result's context window is then a bisect into the keyword positions and its supportive
+    word a lookup in the precomputed matches, giving the same scores as the lemma enhancer.
+
+    Recognizer context words are matched as written, as Presidio does: a capitalized context word never
+    matches the lowercased lemmas. Presidio releases that lowercase context words before matching are
+    detected once and followed.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # frozenset of context words -> automaton, recognizer context lists rarely change
+        self._automata = {}
+        self._lowercase_context_words = self._presidio_lowercases_context_words()
+
+    @staticmethod
+    def _presidio_lowercases_context_words():
+        """Whether the installed LemmaContextAwareEnhancer lowercases recognizer context words."""
+        try:
+            return LemmaContextAwareEnhancer._find_supportive_word_in_context(["keyword"], ["Keyword"]) == "Keyword"
+        except Exception:
+            return False
+
+    def _automaton(self, context_words):
+        key = frozenset(context_words)
+        automaton = self._automata.get(key)
+        if automaton is None:
+            automaton = KeywordAutomaton(key)
+            self._automata[key] = automaton
+        return automaton
+
+    def _keyword_matches(self, automaton, context_words, word):
+        """Context words (as written) a lowercased word supports under the enhancer's matching mode."""
+        if getattr(self, "context_matching_mode", "substring") == "whole_word":
+            return {word} & context_words
+        return automaton.find(word)
+
+    def _build_index(self, nlp_artifacts, automaton, context_words):
+        """
+        Per-document index: token end offsets, positions of keyword tokens with their lowercased lemmas,
+        and for each distinct keyword the context words it contains (as a substring or as the whole word).
+        """
+        tokens = nlp_artifacts.tokens
+        token_ends = [start + len(token) for start, token in zip(nlp_artifacts.tokens_indices, tokens)]
+        keyword_set = set(nlp_artifacts.keywords)
+        positions = []
+        lemmas = []
+        for index, lemma in enumerate(nlp_artifacts.lemmas):
+            lower_lemma = lemma.lower()
+            if lower_lemma in keyword_set:
+                positions.append(index)
+                lemmas.append(lower_lemma)
+        matches = {lemma: self._keyword_matches(automaton, context_words, lemma) for lemma in set(lemmas)}
+        return token_ends, positions, lemmas, matches
+
+    def _window_matches(self, index, token_index, external_matches):
+        """Context words matched by the keywords around token_index, as _extract_surrounding_words collects them."""
+        token_ends, positions, lemmas, matches = index
+        found = set(external_matches)
+        # Backward: the last context_prefix_count + 1 keyword tokens at or before the match token
+        last = bisect_right(positions, token_index)
+        for lemma in lemmas[max(0, last - self.context_prefix_count - 1):last]:
+            found |= matches[lemma]
+        # Forward: the first context_suffix_count + 1 keyword tokens at or after it
+        first = bisect_left(positions, token_index)
+        for lemma in lemmas[first:first + self.context_suffix_count + 1]:
+            found |= matches[lemma]
+        return found
+
+    def enhance_using_context(self, text, raw_results, nlp_artifacts, recognizers, context=None):
+        results = copy.deepcopy(raw_results)
+        recognizers_dict = {recognizer.id: recognizer for recognizer in recognizers}
+        context = [word.lower() for word in context] if context else []
+        if nlp_artifacts is None:
+            return results
+
+        context_words = {
+            word.lower() if self._lowercase_context_words else word
+            for recognizer in recognizers
+            for word in (recognizer.context or [])
+        }
+        if not context_words:
+            return results
+        automaton = self._automaton(context_words)
+        external_matches = set()
+        for word in context:
+            external_matches |= self._keyword_matches(automaton, context_words, word)
+
+        index = None
+        if nlp_artifacts.tokens:
+            index = self._build_index(nlp_artifacts, automaton, context_words)
+        for result in results:
+            metadata = result.recognition_metadata
+            recognizer = None
+            if metadata and RecognizerResult.RECOGNIZER_IDENTIFIER_KEY in metadata:
+                recognizer = recognizers_dict.get(metadata[RecognizerResult.RECOGNIZER_IDENTIFIER_KEY])
+            if not recognizer or not recognizer.context:
+                continue
+            if metadata.get(RecognizerResult.IS_SCORE_ENHANCED_BY_CONTEXT_KEY):
+                continue
+
+            if index is None:
+                # No tokens: the lemma enhancer's context is [""] plus the request context
+                found = external_matches | self._keyword_matches(automaton, context_words, "")
+            else:
+                token_index = bisect_right(index[0], result.start)
+                if token_index == len(index[0]):
+                    raise ValueError(
+                        "Did not find word '" + text[result.start:result.end] + "' "
+                        "in the list of tokens although it is expected to be found"
+                    )
+                found = self._window_matches(index, token_index, external_matches)
+
+            supportive_context_word = next(
+                (
+                    word for word in recognizer.context
+                    if (word.lower() if self._lowercase_context_words else word) in found
+                ),
+                "",
+            )
+            if supportive_context_word != "":
+                result.score += self.context_similarity_factor
+                result.score = max(result.score, self.min_score_with_context_similarity)
+                result.score = min(result.score, ContextAwareEnhancer.MAX_SCORE)
+                result.analysis_explanation.set_supportive_context_word(supportive_context_word)
+                result.analysis_explanation.set_improved_score(result.score)
+        return results
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import utils.logger_test as logger
+
+
+class ExtractionCache:
+    """
+    Persistent, content-addressed store of extracted document text.
+
+    Entries are keyed by the SHA-256 of the file bytes plus the extractor version and settings, stored
+    zlib-compressed in a SQLite file and evicted least-recently-used once the compressed size exceeds
+    max_bytes. Hit and miss counters are kept for the lifetime of the instance.
+    """
+
+    def __init__(self, cache_dir, max_bytes, compression_level=6):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(cache_dir, "extraction_cache.sqlite3"), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._connection.commit()
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def file_digest(file_path, chunk_size=1024 * 1024):
+        """SHA-256 of a file's bytes, read in chunks so large files are never fully in memory."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file_to_hash:
+            for chunk in iter(lambda: file_to_hash.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, file_path, fingerprint):
+        """Cache key for a file: content hash plus the extractor version/settings fingerprint."""
+        return f"{self.file_digest(file_path)}:{fingerprint}"
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss."""
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._connection.commit()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, key, text):
+        """Store text under key and evict least-recently-used entries beyond max_bytes."""
+        data = zlib.compress(text.encode("utf-8"), self.compression_level)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(data), len(data), time.time())
+            )
+            self._total_bytes += len(data)
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes:
+            row = self._connection.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                break
+            self._connection.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+            self.evictions += 1
+            logger.logging.info(f"Extraction cache evicted {row[0]}")
+
+    def stats(self):
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
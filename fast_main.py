@@ -1,6 +1,7 @@
 import concurrent.futures
 import json
 import os
+import sys
 from fastapi import FastAPI, Request, Response, HTTPException, File, UploadFile, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
@@ -30,11 +31,92 @@ from TemporaryStoringClasses import NeededInformation
 from parse_pii import needed_information
 from google_drive import GoogleDriveClient
 from llm import LLMEntityDetector
+from prefork import PreforkServer, memory_report
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import asyncio
 
+# Process-wide extraction engines, built once by the lifespan hook and shared by all requests
+read_files_engine = None
+parse_pii_engine = None
+engine_warmup_error = None
+
+
+def build_engines():
+    """Load the OCR pool and the Presidio analyzer. Runs in a worker thread during startup."""
+    global read_files_engine, parse_pii_engine
+    print("Warming up extraction engines...")
+    if read_files_engine is None:
+        read_files_engine = ReadFiles(max_ocr_instances=8)
+    if parse_pii_engine is None:
+        parse_pii_engine = ParsePii()
+    print(f"Extraction engines ready: ocr={read_files_engine.is_ready()}, analyzer={parse_pii_engine.is_ready()}")
+
+
+def preload_engines():
+    """
+    Pre-fork master: load the Presidio analyzer (spaCy model and recognizers, plain Python objects and numpy
+    arrays) to share copy-on-write. PaddleOCR is not loaded here: Paddle's OpenMP/MKL runtime is not fork-safe,
+    so every worker loads its own OCR pool after the fork, from the lifespan warm-up.
+    """
+    global parse_pii_engine
+    if parse_pii_engine is None:
+        parse_pii_engine = ParsePii()
+
+
+def after_fork_engines():
+    """In a pre-forked worker: reset the analyzer's per-process state, keeping the loaded models shared."""
+    if parse_pii_engine is not None:
+        parse_pii_engine.after_fork()
+
+
+async def warm_engines():
+    global engine_warmup_error
+    try:
+        await asyncio.to_thread(build_engines)
+    except Exception as e:
+        engine_warmup_error = str(e)
+        print(f"Engine warm-up failed: {traceback.format_exc()}")
+
+
+def engines_ready():
+    return (
+        read_files_engine is not None and read_files_engine.is_ready()
+        and parse_pii_engine is not None and parse_pii_engine.is_ready()
+    )
+
+
+def get_read_files():
+    if read_files_engine is None or not read_files_engine.is_ready():
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "error", "message": "OCR engine is still warming up, please retry shortly."}
+        )
+    return read_files_engine
+
+
+def get_parse_pii():
+    if parse_pii_engine is None or not parse_pii_engine.is_ready():
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "error", "message": "PII analyzer is still warming up, please retry shortly."}
+        )
+    return parse_pii_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the server can answer /ready while models load
+    warmup_task = asyncio.create_task(warm_engines())
+    yield
+    warmup_task.cancel()
+    if read_files_engine is not None:
+        read_files_engine.shutdown()
+    if parse_pii_engine is not None:
+        parse_pii_engine.shutdown()
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -91,6 +173,48 @@ async def copy_files(files):
 async def user_login():
     return JSONResponse({"message": "Login endpoint. Please use the React frontend to access."})
 
+@app.get('/ready')
+async def readiness():
+    body = {
+        "ocr_pool": read_files_engine.ocr_instances_loaded if read_files_engine is not None else 0,
+        "ocr_available": read_files_engine.ocr_pool.qsize() if read_files_engine is not None else 0,
+        "analyzer": parse_pii_engine is not None and parse_pii_engine.is_ready(),
+    }
+    if engines_ready():
+        return JSONResponse({"status": "ready", **body})
+    if engine_warmup_error:
+        body["error"] = engine_warmup_error
+    return JSONResponse(status_code=503, content={"status": "warming_up", **body})
+
+@app.get('/cache_stats')
+async def extraction_cache_stats():
+    if read_files_engine is None:
+        return JSONResponse({"status": "warming_up", "cache": {}})
+    return JSONResponse({"status": "success", "cache": read_files_engine.cache_stats()})
+
+@app.get('/memory_stats')
+async def serving_memory_stats():
+    # Per-worker unique (private) memory shows what pre-fork serving saves over independent workers
+    return JSONResponse({"status": "success", "memory": memory_report()})
+
+@app.get('/ocr_stats')
+async def ocr_mode_stats():
+    if read_files_engine is None:
+        return JSONResponse({"status": "warming_up", "ocr": {}})
+    return JSONResponse({"status": "success", "ocr": read_files_engine.ocr_stats()})
+
+@app.get('/nlp_stats')
+async def nlp_component_stats():
+    if parse_pii_engine is None:
+        return JSONResponse({"status": "warming_up", "nlp": {}})
+    return JSONResponse({"status": "success", "nlp": parse_pii_engine.nlp_stats()})
+
+@app.get('/scheduler_stats')
+async def extraction_scheduler_stats():
+    if read_files_engine is None:
+        return JSONResponse({"status": "warming_up", "scheduler": {}})
+    return JSONResponse({"status": "success", "scheduler": read_files_engine.scheduler_stats()})
+
 @app.post('/upload')
 async def upload_form(request: Request):
     if request.method == 'POST':
@@ -168,8 +292,8 @@ def extractedDataFrame(entities, user_option):
     try:
         output_path = os.path.join(os.getcwd(), "images")
         common.delete_folder_files(output_path, True)
-        parse_pii = ParsePii()
-        read_files = ReadFiles()
+        parse_pii = get_parse_pii()
+        read_files = get_read_files()
         dataFrame = pd.DataFrame(columns=common.dataframe_columns)
         current_dir = os.path.join("..", common.temp_folder)
         files = os.listdir(current_dir)
@@ -189,17 +313,13 @@ def extractedDataFrame(entities, user_option):
         stream_df = setGetStreamingDataframe.get_stream_dataframe()
         if not stream_df.empty:
             dataFrame = pd.concat([dataFrame, stream_df], ignore_index=True)
-        dataFrame["Has PII ?"] = dataFrame["text"].apply(lambda text: parse_pii.classify(text, entities=entities))
-        dataFrame["Extracted Fields"] = dataFrame["text"].apply(lambda text: parse_pii.extract(text, entities=entities))
+        # One batched NLP pass over all documents feeds the flag, the counts and the values
+        analyses = pd.Series(parse_pii.extract_batch(dataFrame["text"].tolist(), entities), index=dataFrame.index)
+        dataFrame["Has PII ?"] = analyses.apply(lambda analysis: analysis["has_pii"])
+        dataFrame["Extracted Fields"] = analyses.apply(lambda analysis: (analysis["counts"], analysis["values"]))
+        dataFrame["Needed Information"] = analyses.apply(lambda analysis: analysis["values"])
         dataFrame.fillna("", inplace=True)
         dataFrame = dataFrame[dataFrame['text'] != ""]
-
-        # Handle None return from parse_pii.extract
-        def safe_extract(text, entities):
-            result = parse_pii.extract(text, entities=entities)
-            return result[1] if result is not None and isinstance(result, (list, tuple)) and len(result) > 1 else {}
-
-        dataFrame["Needed Information"] = dataFrame["text"].apply(lambda text: safe_extract(text, entities))
         dataFrame.reset_index(inplace=True, drop=True)
         setGetDataframe.set_dataframe(dataFrame)
         
@@ -364,14 +484,88 @@ def map_ui_entities_to_detector_entities(ui_entities):
     return list(set(mapped_entities))  # Remove duplicates
 
 
+def merge_entity_results(merged, result, seen):
+    """
+    Fold one chunk's {category: {entity: [values]}} detection result into a file's combined result. Values
+    already recorded are skipped, since overlapping text chunks can report the same entity twice; seen holds
+    a set of the recorded values per (category, entity) next to the lists, so each check is constant time.
+    """
+    if not isinstance(result, dict):
+        return merged
+    for category, category_entities in result.items():
+        if not isinstance(category_entities, dict):
+            continue
+        merged_category = merged.setdefault(category, {})
+        for entity, values in category_entities.items():
+            merged_values = merged_category.setdefault(entity, [])
+            seen_values = seen.setdefault((category, entity), set())
+            for value in values or []:
+                # Unhashable values (nested lists or dicts from the LLM) fall back to a list scan
+                try:
+                    if value in seen_values:
+                        continue
+                    seen_values.add(value)
+                except TypeError:
+                    if value in merged_values:
+                        continue
+                merged_values.append(value)
+    return merged
+
+
+async def detect_entities_streaming(read_files, llm_detector, paths, entities, category_mapping, user_prompt,
+                                    ocr_mode=None):
+    """
+    Run entity detection on each page chunk as read_files.stream_files produces it. At most
+    common.stream_page_window chunks are being detected at once, which also throttles extraction,
+    so only a bounded number of pages is held in memory.
+    """
+    loop = asyncio.get_running_loop()
+    in_flight = asyncio.Semaphore(common.stream_page_window)
+    file_results = {}
+    # Per file, the set of values already merged for each (category, entity)
+    file_seen_values = {}
+    detection_tasks = []
+
+    async def detect_chunk(file_name, page_no, text):
+        try:
+            result = await loop.run_in_executor(
+                None,
+                lambda: llm_detector.detect_entities(text, entities, category_mapping, f"{file_name} (page {page_no})", user_prompt)
+            )
+            merge_entity_results(
+                file_results.setdefault(file_name, {}), result, file_seen_values.setdefault(file_name, {})
+            )
+        except Exception as e:
+            print(f"Error in entity detection for file {file_name} page {page_no}: {e}")
+        finally:
+            in_flight.release()
+
+    async for file_name, page_no, text in read_files.stream_files(paths, ocr_mode=ocr_mode):
+        if not text:
+            continue
+        file_results.setdefault(file_name, {})
+        await in_flight.acquire()
+        detection_tasks.append(asyncio.create_task(detect_chunk(file_name, page_no, text)))
+
+    await asyncio.gather(*detection_tasks)
+    return pd.DataFrame(
+        [{"File Name": file_name, "entities": result} for file_name, result in file_results.items()],
+        columns=["File Name", "entities"]
+    )
+
+
 @app.post("/success")
 async def displayExtractedResults(
     selectedOption: str = Form(...),
     country: str = Form(None),
     multiple: str = Form(default='[]'),
     categoryMapping: str = Form(None),
-    user_prompt: str = Form(None)
+    user_prompt: str = Form(None),
+    stream_pages: str = Form(None),
+    ocr_mode: str = Form(None)
 ):
+    # Shared ReadFiles instance with a warm OCR pool (built once at startup)
+    read_files = get_read_files()
     try:
         # Log raw form data for debugging
         print(f"Received form data: selectedOption={selectedOption}, country={country}, multiple={multiple}, categoryMapping={categoryMapping}, user_prompt={user_prompt}")
@@ -433,68 +627,83 @@ async def displayExtractedResults(
             entities = []
             print("Fallback to empty entities list")
 
-        # Initialize ReadFiles with more OCR instances for better performance
-        read_files = ReadFiles(max_ocr_instances=8)
-        llm_detector = LLMEntityDetector()
-
-        # Process files asynchronously for text extraction
-        print("Starting file processing...")
-        results = await read_files.file_reader(paths)
-        print(f"File processing completed. Extracted text from {len(results)} files.")
-
-        # Create DataFrame from results
-        dataFrame = pd.DataFrame([
-            {"File Name": file_name, "text": text}
-            for file_name, text in results.items()
-        ])
-
-        # Log extracted text for debugging
-        for _, row in dataFrame.iterrows():
-            print(f"Extracted text from {row['File Name']} (first 200 chars): {row['text'][:200]}")
-            if len(row['text']) > 200:
-                print(f"Full extracted text length: {len(row['text'])} chars")
+        if ocr_mode and ocr_mode not in common.ocr_modes:
+            print(f"Unknown OCR mode {ocr_mode}, using {common.ocr_mode}")
+            ocr_mode = None
 
-        # Filter out empty text rows
-        dataFrame = dataFrame[dataFrame["text"] != ""]
-        dataFrame.reset_index(inplace=True, drop=True)
+        llm_detector = LLMEntityDetector()
 
-        if dataFrame.empty:
-            print("No valid files found with text content: ", paths)
-            return {
-                "status": "success",
-                "data": []
-            }
+        if str(stream_pages).lower() in ("1", "true", "yes"):
+            # Detection starts on the first pages while the rest of the documents are still being read
+            print("Starting streaming file processing and entity detection...")
+            dataFrame = await detect_entities_streaming(
+                read_files, llm_detector, paths, entities, category_mapping, user_prompt, ocr_mode
+            )
+            if dataFrame.empty:
+                print("No valid files found with text content: ", paths)
+                return {
+                    "status": "success",
+                    "data": []
+                }
+        else:
+            # Process files asynchronously for text extraction
+            print("Starting file processing...")
+            results = await read_files.file_reader(paths, ocr_mode=ocr_mode)
+            print(f"File processing completed. Extracted text from {len(results)} files.")
+
+            # Create DataFrame from results
+            dataFrame = pd.DataFrame([
+                {"File Name": file_name, "text": text}
+                for file_name, text in results.items()
+            ])
+
+            # Log extracted text for debugging
+            for _, row in dataFrame.iterrows():
+                print(f"Extracted text from {row['File Name']} (first 200 chars): {row['text'][:200]}")
+                if len(row['text']) > 200:
+                    print(f"Full extracted text length: {len(row['text'])} chars")
+
+            # Filter out empty text rows
+            dataFrame = dataFrame[dataFrame["text"] != ""]
+            dataFrame.reset_index(inplace=True, drop=True)
+
+            if dataFrame.empty:
+                print("No valid files found with text content: ", paths)
+                return {
+                    "status": "success",
+                    "data": []
+                }
 
-        # Optimize entity detection with more workers and async processing
-        print("Starting entity detection...")
-        with ThreadPoolExecutor(max_workers=min(len(dataFrame), os.cpu_count() * 2)) as executor:
-            # Prepare arguments for detect_entities
-            detect_args = [
-                (row["text"], entities, category_mapping, row["File Name"], user_prompt)
-                for _, row in dataFrame.iterrows()
-            ]
+            # Optimize entity detection with more workers and async processing
+            print("Starting entity detection...")
+            with ThreadPoolExecutor(max_workers=min(len(dataFrame), os.cpu_count() * 2)) as executor:
+                # Prepare arguments for detect_entities
+                detect_args = [
+                    (row["text"], entities, category_mapping, row["File Name"], user_prompt)
+                    for _, row in dataFrame.iterrows()
+                ]
             
-            # Use async approach for better performance
-            loop = asyncio.get_event_loop()
-            entity_detection_tasks = [
-                loop.run_in_executor(executor, lambda args=args: llm_detector.detect_entities(*args))
-                for args in detect_args
-            ]
+                # Use async approach for better performance
+                loop = asyncio.get_event_loop()
+                entity_detection_tasks = [
+                    loop.run_in_executor(executor, lambda args=args: llm_detector.detect_entities(*args))
+                    for args in detect_args
+                ]
             
-            # Wait for all entity detection to complete
-            entity_results = await asyncio.gather(*entity_detection_tasks, return_exceptions=True)
+                # Wait for all entity detection to complete
+                entity_results = await asyncio.gather(*entity_detection_tasks, return_exceptions=True)
             
-            # Create entities column and handle results
-            entities_column = []
-            for i, result in enumerate(entity_results):
-                if isinstance(result, Exception):
-                    print(f"Error in entity detection for file {dataFrame.iloc[i]['File Name']}: {result}")
-                    entities_column.append({})
-                else:
-                    entities_column.append(result)
+                # Create entities column and handle results
+                entities_column = []
+                for i, result in enumerate(entity_results):
+                    if isinstance(result, Exception):
+                        print(f"Error in entity detection for file {dataFrame.iloc[i]['File Name']}: {result}")
+                        entities_column.append({})
+                    else:
+                        entities_column.append(result)
             
-            # Add entities column to DataFrame
-            dataFrame["entities"] = entities_column
+                # Add entities column to DataFrame
+                dataFrame["entities"] = entities_column
 
         print("Entity detection completed.")
 
@@ -911,5 +1120,16 @@ async def add_cache_control_headers(request: Request, call_next):
     return response
 
 if __name__ == '__main__':
-    import uvicorn
-    uvicorn.run(app, host='0.0.0.0', port=8001)
\ No newline at end of file
+    if common.prefork_workers > 1:
+        unset = [name for name in common.prefork_thread_env if name not in os.environ]
+        if unset:
+            # Native libraries size their thread pools when they load, so restart with the limits in place
+            os.environ.update({name: "1" for name in unset})
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+        PreforkServer(
+            app, host='0.0.0.0', port=8001, workers=common.prefork_workers,
+            preload=preload_engines, after_fork=after_fork_engines
+        ).run()
+    else:
+        import uvicorn
+        uvicorn.run(app, host='0.0.0.0', port=8001)
\ No newline at end of file
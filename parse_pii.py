@@ -1,21 +1,124 @@
+import copy
 import os
 from presidio_analyzer.nlp_engine import SpacyNlpEngine
-from presidio_analyzer import AnalyzerEngine, Pattern, PatternRecognizer
-from presidio_analyzer.nlp_engine import NlpEngineProvider
+from presidio_analyzer import AnalyzerEngine, Pattern, PatternRecognizer, RecognizerResult, EntityRecognizer
+from presidio_analyzer.nlp_engine import NlpEngineProvider, NlpArtifacts
+from presidio_analyzer.predefined_recognizers import SpacyRecognizer
 from presidio_analyzer.recognizer_registry import RecognizerRegistry
 import warnings
 import utils.logger_test as logger
 from utils import common
 from TemporaryStoringClasses import NeededInformation
+from pattern_scanner import MultiPatternScanner
+from context_index import IndexedContextEnhancer
+from span_table import SpanTable, DocumentAnalysis
 from typing import List, Dict, Any
 import spacy
 import re
 import traceback
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 warnings.filterwarnings("ignore")
 
 needed_information = NeededInformation()
 
+# Analyzer owned by a worker process of the chunked-analysis pool
+_worker_parse_pii = None
+
+
+def _init_analysis_worker():
+    """Process-pool initializer: build one analyzer (spaCy model and recognizers) per worker process."""
+    global _worker_parse_pii
+    _worker_parse_pii = ParsePii()
+
+
+def _analyze_chunk(parse_pii, chunk, entities, offset):
+    """Analyze one chunk and return its results as (entity_type, start, end, score) in document offsets."""
+    nlp_artifacts = parse_pii.trimmed_nlp_artifacts([chunk], entities)
+    response = parse_pii.analyzer.analyze(
+        correlation_id=0, text=chunk, entities=entities, language='en',
+        nlp_artifacts=nlp_artifacts[0] if nlp_artifacts else None
+    )
+    return [(item.entity_type, item.start + offset, item.end + offset, item.score) for item in response]
+
+
+def _analyze_chunk_in_worker(chunk, entities, offset):
+    return _analyze_chunk(_worker_parse_pii, chunk, entities, offset)
+
+
+def _chunk_bounds(text, chunk_chars, overlap_chars):
+    """
+    (start, end) offsets of overlapping chunks covering text. Chunks end on a space when one falls in
+    their second half, and each chunk starts on a word boundary within overlap_chars of the previous end.
+    """
+    length = len(text)
+    bounds = []
+    start = 0
+    while True:
+        end = min(start + chunk_chars, length)
+        if end < length:
+            space = text.rfind(" ", start + chunk_chars // 2, end)
+            if space > start:
+                end = space
+        bounds.append((start, end))
+        if end >= length:
+            return bounds
+        next_start = max(end - overlap_chars, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+
+
+def _resolve_boundary_spans(bounds, chunk_results):
+    """
+    Settle spans that two neighbouring chunks report differently in their overlap. A span both chunks
+    report identically is kept (remove_duplicates collapses it later); otherwise, whatever their entity
+    types, of two overlapping spans from the two chunks the one cut by its chunk's edge is dropped, or,
+    when neither or both are cut, the lower-scoring (then shorter) one.
+
+    Parameters:
+    ---------
+    bounds: (start, end) of each chunk in document offsets.
+    chunk_results: Per chunk, (entity_type, start, end, score) tuples in document offsets.
+
+    Return:
+    ------
+    chunk_results: The same lists without the dropped spans.
+    """
+    dropped = [set() for _ in chunk_results]
+    for left in range(len(bounds) - 1):
+        right = left + 1
+        zone_start, zone_end = bounds[right][0], bounds[left][1]
+        left_spans = [(index, span) for index, span in enumerate(chunk_results[left])
+                      if span[1] < zone_end and span[2] > zone_start]
+        right_spans = [(index, span) for index, span in enumerate(chunk_results[right])
+                       if span[1] < zone_end and span[2] > zone_start]
+        agreed = {span[:3] for _, span in left_spans} & {span[:3] for _, span in right_spans}
+        for left_index, left_span in left_spans:
+            if left_span[:3] in agreed:
+                continue
+            for right_index, right_span in right_spans:
+                if right_span[:3] in agreed or right_index in dropped[right]:
+                    continue
+                if left_span[1] >= right_span[2] or right_span[1] >= left_span[2]:
+                    continue
+                left_cut = left_span[2] >= bounds[left][1]
+                right_cut = right_span[1] <= bounds[right][0]
+                if left_cut != right_cut:
+                    left_loses = left_cut
+                else:
+                    left_loses = (left_span[3], left_span[2] - left_span[1]) < (right_span[3], right_span[2] - right_span[1])
+                if left_loses:
+                    dropped[left].add(left_index)
+                    break
+                dropped[right].add(right_index)
+    return [
+        [span for index, span in enumerate(spans) if index not in dropped_indices]
+        for spans, dropped_indices in zip(chunk_results, dropped)
+    ]
+
 class ParsePii:
     # Define PII categories as class attributes
     CONFIDENTIAL = {
@@ -36,8 +139,49 @@ class ParsePii:
         'IBAN_CODE', 'IBAN_CODE_CUSTOM', 'IP_ADDRESS', 'URL', 'NRP'
     }
 
+    CATEGORIES = {"Confidential": CONFIDENTIAL, "Private": PRIVATE, "Restricted": RESTRICTED}
+
+    # spaCy components whose output Presidio never reads (NlpArtifacts holds tokens, lemmas and entities),
+    # though sentence starts set before NER stop entities from crossing them
+    UNUSED_NLP_COMPONENTS = {"parser", "senter"}
+    # Components that only feed token lemmas, which the context enhancer matches context words against
+    LEMMA_NLP_COMPONENTS = {"tagger", "morphologizer", "attribute_ruler", "lemmatizer", "trainable_lemmatizer"}
+    # Of those, the ones setting attributes NER does not read (attribute_ruler may also set norms)
+    NER_INDEPENDENT_NLP_COMPONENTS = {"tagger", "morphologizer", "lemmatizer", "trainable_lemmatizer"}
+    ENTITY_NLP_COMPONENTS = {"ner", "entity_ruler", "span_ruler"}
+    # Distinct entity selections whose skipped components are remembered
+    SKIPPED_COMPONENTS_CACHE_SIZE = 256
+
+    # Manual patterns for critical entities that might be missed by the analyzer
+    MANUAL_PATTERNS = {
+        'IN_AADHAR_CARD_CUSTOM': r'\b\d{4}[\s\-]?\d{4}[\s\-]?\d{4}\b',
+        'IN_AADHAAR': r'\b\d{4}[\s\-]?\d{4}[\s\-]?\d{4}\b',
+        'IN_VOTER_ID_CUSTOM': r'\b[A-Z]{3}\d{7}\b',
+        'IN_PAN_CUSTOM': r'\b[A-Z]{5}\d{4}[A-Z]\b',
+        'IN_PAN': r'\b[A-Z]{5}\d{4}[A-Z]\b',
+        'IN_BANK_ACCOUNT': r'(?<!\d)\d{12,18}(?!\d)',
+        'IN_PHONE_NUMBER': r'(?:\+91[\s\-]?)?(?:0)?[6-9]\d{9}\b',
+        'IN_PASSPORT_CUSTOM': r'\b[A-PR-WY][0-9]{7}\b',
+        'IN_VEHICLE_REGISTRATION_CUSTOM': r'\b[A-Z]{2}[ -]?\d{1,2}[ -]?[A-Z]{1,3}[ -]?\d{4}\b',
+        'IN_DRIVING_LICENSE': r'\b[A-Z]{2}-?\d{2}-?\d{4}-?\d{7}\b'
+    }
+    # Compiled once; entity types sharing a regex (Aadhaar, PAN) are matched in one pass
+    MANUAL_SCANNER = MultiPatternScanner({entity_type: (pattern, 0) for entity_type, pattern in MANUAL_PATTERNS.items()})
+
     def __init__(self):
         print("ParsePii.__init__: Starting initialization")
+        self.analysis_pool = None
+        self._analysis_pool_lock = threading.Lock()
+        self._ner_entities = None
+        self._tokenizer_nlp = None
+        # frozenset of entity types -> spaCy components their analysis skips
+        self._skipped_components = {}
+        # tuple of skipped components -> NLP engine running the shared pipeline without them
+        self._trimmed_nlp_engines = {}
+        self._trimmed_nlp_engines_lock = threading.Lock()
+        # Per pipeline variant (components skipped): documents run and seconds spent
+        self.nlp_component_stats = {}
+        self._nlp_stats_lock = threading.Lock()
         try:
             self.analyzer = self.main()
             if self.analyzer is None:
@@ -48,6 +192,273 @@ class ParsePii:
             print(f"ParsePii.__init__: Failed to initialize: {traceback.format_exc()}")
             self.analyzer = None
 
+    def is_ready(self):
+        """Return True when the AnalyzerEngine (spaCy model and recognizer registry) is loaded."""
+        return self.analyzer is not None
+
+    @staticmethod
+    def analysis_worker_count():
+        """
+        Chunked-analysis worker processes to start: common.pii_analysis_workers, capped by the CPU count and
+        by how many full analyzers (spaCy model and recognizers, one per worker) fit in the memory budget.
+        """
+        workers = min(common.pii_analysis_workers, os.cpu_count() or 1)
+        if common.pii_analysis_worker_mb > 0:
+            workers = min(workers, common.pii_analysis_memory_mb // common.pii_analysis_worker_mb)
+        return workers
+
+    def _get_analysis_pool(self):
+        """Process pool for chunked analysis, started on the first long document (None when disabled)."""
+        workers = self.analysis_worker_count()
+        if workers <= 1:
+            return None
+        with self._analysis_pool_lock:
+            if self.analysis_pool is None:
+                try:
+                    print(f"ParsePii: Starting {workers} analysis worker processes, "
+                          f"about {workers * common.pii_analysis_worker_mb} MB of models")
+                    self.analysis_pool = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_analysis_worker,
+                    )
+                except Exception as e:
+                    print(f"ParsePii: Failed to start analysis worker processes: {e}")
+                    logger.logging.error(f"Analysis process pool error: {str(e)}")
+                    return None
+            return self.analysis_pool
+
+    def recognizers_for(self, entities):
+        """Recognizers of the analyzer's registry supporting any of entities (all of them when entities is empty)."""
+        selection = set(entities or ())
+        return [
+            recognizer for recognizer in self.analyzer.registry.recognizers
+            if not selection or not selection.isdisjoint(recognizer.supported_entities)
+        ]
+
+    def skipped_nlp_components(self, entities):
+        """
+        spaCy components an analysis of entities can skip without changing its results, in pipeline order:
+        the ones Presidio ignores, plus the lemma components when no recognizer of the selection has context
+        words. A candidate that runs before NER is only skipped when NER does not depend on it, or for the
+        parser when common.pii_pipeline_skip_parser allows entities to span sentence boundaries. Computed
+        once per entity selection.
+        """
+        key = frozenset(entities or ())
+        skipped = self._skipped_components.get(key)
+        if skipped is not None:
+            return skipped
+        pipe_names = self.analyzer.nlp_engine.nlp["en"].pipe_names
+        candidates = set(self.UNUSED_NLP_COMPONENTS)
+        if not any(recognizer.context for recognizer in self.recognizers_for(entities)):
+            candidates |= self.LEMMA_NLP_COMPONENTS
+        entity_positions = [index for index, name in enumerate(pipe_names) if name in self.ENTITY_NLP_COMPONENTS]
+        last_entity = entity_positions[-1] if entity_positions else -1
+        skipped = tuple(
+            name for index, name in enumerate(pipe_names)
+            if name in candidates and (
+                index > last_entity or name in self.NER_INDEPENDENT_NLP_COMPONENTS
+                or (name in self.UNUSED_NLP_COMPONENTS and common.pii_pipeline_skip_parser)
+            )
+        )
+        if len(self._skipped_components) >= self.SKIPPED_COMPONENTS_CACHE_SIZE:
+            self._skipped_components.clear()
+        self._skipped_components[key] = skipped
+        return skipped
+
+    def _record_nlp_stats(self, skipped, docs, seconds):
+        with self._nlp_stats_lock:
+            stats = self.nlp_component_stats.setdefault(skipped, {"docs": 0, "seconds": 0.0})
+            stats["docs"] += docs
+            stats["seconds"] += seconds
+
+    def trimmed_nlp_engine(self, skipped):
+        """
+        Copy of the analyzer's spaCy NLP engine whose English pipeline leaves out the skipped components.
+        The trimmed pipeline is a new Language holding the loaded pipeline's vocab, tokenizer and component
+        instances, so it costs no model memory and the shared pipeline is never changed. Built once per
+        variant; the variants are subsets of a handful of candidate components.
+        """
+        nlp_engine = self.analyzer.nlp_engine
+        if not skipped:
+            return nlp_engine
+        trimmed_engine = self._trimmed_nlp_engines.get(skipped)
+        if trimmed_engine is None:
+            with self._trimmed_nlp_engines_lock:
+                trimmed_engine = self._trimmed_nlp_engines.get(skipped)
+                if trimmed_engine is None:
+                    nlp = nlp_engine.nlp["en"]
+                    trimmed = nlp.__class__(vocab=nlp.vocab, meta=nlp.meta)
+                    trimmed.tokenizer = nlp.tokenizer
+                    for name in nlp.pipe_names:
+                        if name not in skipped:
+                            trimmed.add_pipe(name, source=nlp)
+                    trimmed_engine = copy.copy(nlp_engine)
+                    trimmed_engine.nlp = {**nlp_engine.nlp, "en": trimmed}
+                    self._trimmed_nlp_engines[skipped] = trimmed_engine
+        return trimmed_engine
+
+    def trimmed_nlp_artifacts(self, texts, entities, batch_size=None, n_process=1):
+        """
+        NLP artifacts for texts from the public process_text / process_batch of an NLP engine that runs
+        without the components skipped_nlp_components names (see trimmed_nlp_engine). Returns None when
+        trimming is disabled or the NLP engine is not a spaCy engine, so that Presidio runs the full
+        pipeline itself.
+
+        Parameters:
+        ---------
+        texts: List of texts.
+        entities: Entity types the artifacts will be analyzed for.
+        batch_size: Batch documents through nlp.pipe (default one process_text call per document).
+        n_process: nlp.pipe processes when batching.
+
+        Return:
+        ------
+        artifacts: List of NlpArtifacts in the order of texts, or None.
+        """
+        if not common.pii_pipeline_trimming or not isinstance(self.analyzer.nlp_engine, SpacyNlpEngine):
+            return None
+        skipped = self.skipped_nlp_components(entities)
+        nlp_engine = self.trimmed_nlp_engine(skipped)
+        start = time.perf_counter()
+        if batch_size:
+            try:
+                batch = nlp_engine.process_batch(texts, language="en", batch_size=batch_size, n_process=n_process)
+            except TypeError:
+                # Older Presidio releases batch through nlp.pipe without exposing its parameters
+                batch = nlp_engine.process_batch(texts, language="en")
+            artifacts = [nlp_artifacts for _, nlp_artifacts in batch]
+        else:
+            artifacts = [nlp_engine.process_text(text, "en") for text in texts]
+        self._record_nlp_stats(skipped, len(texts), time.perf_counter() - start)
+        return artifacts
+
+    def nlp_stats(self):
+        """
+        Per pipeline variant ("full", or the components it skipped): documents run, ms per document and
+        the seconds saved next to the full pipeline's mean time.
+        """
+        with self._nlp_stats_lock:
+            stats = {skipped: dict(values) for skipped, values in self.nlp_component_stats.items()}
+        full = stats.get(())
+        full_per_doc = full["seconds"] / full["docs"] if full and full["docs"] else None
+        report = {}
+        for skipped, values in stats.items():
+            per_doc = values["seconds"] / values["docs"] if values["docs"] else None
+            report["full" if not skipped else "without " + ",".join(skipped)] = {
+                "docs": values["docs"],
+                "ms_per_doc": round(per_doc * 1000, 3) if per_doc is not None else None,
+                # Estimated from the full pipeline's mean time on the documents that ran it
+                "seconds_saved": round((full_per_doc - per_doc) * values["docs"], 3)
+                if skipped and full_per_doc is not None and per_doc is not None else None,
+            }
+        return report
+
+    def needs_ner(self, entities):
+        """
+        True when any requested entity is produced by spaCy NER (PERSON, LOCATION, NRP, DATE_TIME, ...), or
+        when no entity list is given. Otherwise only pattern recognizers apply and the NER model can be skipped.
+        """
+        if not common.pii_regex_fast_path or not entities:
+            return True
+        if self._ner_entities is None:
+            self._ner_entities = {
+                entity
+                for recognizer in self.analyzer.registry.recognizers
+                if isinstance(recognizer, SpacyRecognizer)
+                for entity in recognizer.supported_entities
+            }
+        return not self._ner_entities.isdisjoint(entities)
+
+    def _pattern_only_artifacts(self, text):
+        """
+        NLP artifacts from a blank spaCy tokenizer (no tagger, lemmatizer or NER): enough for pattern
+        recognizers and context scoring, where lowercased tokens stand in for lemmas.
+        """
+        if self._tokenizer_nlp is None:
+            tokenizer_nlp = spacy.blank("en")
+            # Tokenizing is linear, so the fast path needs no chunking for long documents
+            tokenizer_nlp.max_length = 10 ** 9
+            self._tokenizer_nlp = tokenizer_nlp
+        doc = self._tokenizer_nlp(text)
+        return NlpArtifacts(
+            entities=[],
+            tokens=doc,
+            tokens_indices=[token.idx for token in doc],
+            lemmas=[token.lower_ for token in doc],
+            nlp_engine=self.analyzer.nlp_engine,
+            language="en",
+        )
+
+    def analyze_text(self, text, entities, nlp_artifacts=None):
+        """
+        Run the analyzer over text. Texts longer than common.pii_chunk_chars are split into chunks that
+        overlap by common.pii_chunk_overlap_chars, analyzed in parallel on the worker processes, remapped to
+        document offsets and deduplicated, so entities on a chunk boundary are reported once.
+
+        Parameters:
+        ---------
+        text: Text to analyze.
+        entities: Entity types to detect.
+        nlp_artifacts: spaCy artifacts already computed for text (from extract_batch), used for short texts.
+
+        Return:
+        ------
+        response: List of RecognizerResult with offsets into text.
+        """
+        if nlp_artifacts is None and not self.needs_ner(entities):
+            # Pattern-only entity set: regexes and context words on tokenized raw text, no NER model
+            return self.analyzer.analyze(
+                correlation_id=0, text=text, entities=entities, language='en',
+                nlp_artifacts=self._pattern_only_artifacts(text)
+            )
+        if len(text) <= common.pii_chunk_chars:
+            if nlp_artifacts is None:
+                trimmed = self.trimmed_nlp_artifacts([text], entities)
+                nlp_artifacts = trimmed[0] if trimmed else None
+            return self.analyzer.analyze(
+                correlation_id=0, text=text, entities=entities, language='en', nlp_artifacts=nlp_artifacts
+            )
+
+        bounds = _chunk_bounds(text, common.pii_chunk_chars, common.pii_chunk_overlap_chars)
+        print(f"ParsePii.analyze_text: Analyzing {len(text)} chars in {len(bounds)} chunks")
+        chunks = [text[start:end] for start, end in bounds]
+        offsets = [start for start, _ in bounds]
+        pool = self._get_analysis_pool()
+        chunk_results = None
+        if pool is not None:
+            try:
+                chunk_results = list(pool.map(_analyze_chunk_in_worker, chunks, [entities] * len(chunks), offsets))
+            except Exception as e:
+                print(f"ParsePii.analyze_text: Worker analysis failed, analyzing in process: {e}")
+                logger.logging.error(f"Chunked analysis error: {str(e)}")
+        if chunk_results is None:
+            chunk_results = [
+                _analyze_chunk(self, chunk, entities, offset) for chunk, offset in zip(chunks, offsets)
+            ]
+        # A span cut by a chunk edge may come back with another entity type than the whole match
+        chunk_results = _resolve_boundary_spans(bounds, chunk_results)
+        results = [
+            RecognizerResult(entity_type=entity_type, start=start, end=end, score=score)
+            for chunk_result in chunk_results
+            for entity_type, start, end, score in chunk_result
+        ]
+        # Spans found in two overlapping chunks, or cut by a boundary and contained in the whole match, collapse here
+        return EntityRecognizer.remove_duplicates(results)
+
+    def after_fork(self):
+        """Drop the parent's analysis worker processes and lock in a forked process; models stay shared."""
+        self.analysis_pool = None
+        self._analysis_pool_lock = threading.Lock()
+        self._trimmed_nlp_engines_lock = threading.Lock()
+        self._nlp_stats_lock = threading.Lock()
+
+    def shutdown(self):
+        """Stop the chunked-analysis worker processes."""
+        if self.analysis_pool is not None:
+            self.analysis_pool.shutdown(wait=True)
+            self.analysis_pool = None
+
     def main(self):
         try:
             print("ParsePii.main: Configuring AnalyzerEngine")
@@ -264,7 +675,9 @@ class ParsePii:
                 analyzer = AnalyzerEngine(
                     registry=registry,
                     nlp_engine=nlp_engine,
-                    supported_languages=["en"]
+                    supported_languages=["en"],
+                    # Same scores as Presidio's lemma enhancer, with context keywords indexed once per document
+                    context_aware_enhancer=IndexedContextEnhancer()
                 )
                 print("ParsePii.main: AnalyzerEngine created successfully")
             except Exception as e:
@@ -284,24 +697,6 @@ class ParsePii:
             logger.logging.error(str(e))
             return None
 
-    def entity_counter(self, entity_list):
-        try:
-            freq = {}
-            entity_list = sorted(entity_list)
-            for items in entity_list:
-                freq[items] = entity_list.count(items)
-            counter = ""
-            for key, value in freq.items():
-                if key == entity_list[-1]:
-                    counter += f"{key}:{value}"
-                else:
-                    counter += f"{key}:{value}, "
-            print("Number of Entities...:", counter)
-            logger.logging.info("Count of each entity from a file")
-            return counter
-        except Exception as exp:
-            logger.logging.error(str(exp))
-
     def classify(self, text="", **kwargs):
         try:
             if self.analyzer is None:
@@ -312,10 +707,10 @@ class ParsePii:
             if "path" in kwargs and "fileName" in kwargs:
                 with open(os.path.join(kwargs["path"], kwargs["fileName"])) as open_file:
                     text = open_file.read()
-                    response = self.analyzer.analyze(correlation_id=0, text=text, entities=entities, language='en')
+                    response = self.analyze_text(text, entities)
                     return "yes" if len(response) > 0 else "no"
             elif text:
-                response = self.analyzer.analyze(correlation_id=0, text=text, entities=entities, language='en')
+                response = self.analyze_text(text, entities)
                 return "yes" if len(response) > 0 else "no"
             else:
                 logger.logging.info("Classify text from a file")
@@ -328,33 +723,20 @@ class ParsePii:
         """Manual regex-based extraction for critical entities that might be missed"""
         manual_results = {}
         
-        # Define manual patterns for critical entities
-        manual_patterns = {
-            'IN_AADHAR_CARD_CUSTOM': r'\b\d{4}[\s\-]?\d{4}[\s\-]?\d{4}\b',
-            'IN_AADHAAR': r'\b\d{4}[\s\-]?\d{4}[\s\-]?\d{4}\b',
-            'IN_VOTER_ID_CUSTOM': r'\b[A-Z]{3}\d{7}\b',
-            'IN_PAN_CUSTOM': r'\b[A-Z]{5}\d{4}[A-Z]\b',
-            'IN_PAN': r'\b[A-Z]{5}\d{4}[A-Z]\b',
-            'IN_BANK_ACCOUNT': r'(?<!\d)\d{12,18}(?!\d)',
-            'IN_PHONE_NUMBER': r'(?:\+91[\s\-]?)?(?:0)?[6-9]\d{9}\b',
-            'IN_PASSPORT_CUSTOM': r'\b[A-PR-WY][0-9]{7}\b',
-            'IN_VEHICLE_REGISTRATION_CUSTOM': r'\b[A-Z]{2}[ -]?\d{1,2}[ -]?[A-Z]{1,3}[ -]?\d{4}\b',
-            'IN_DRIVING_LICENSE': r'\b[A-Z]{2}-?\d{2}-?\d{4}-?\d{7}\b'
-        }
-        
         # Only check for entities that are requested
-        for entity_type, pattern in manual_patterns.items():
-            if entity_type in entities:
-                matches = re.findall(pattern, text)
-                if matches:
-                    # Validate and deduplicate matches
-                    validated_matches = set()  # Use set to deduplicate
-                    for match in matches:
-                        if self._validate_entity(entity_type, match):
-                            validated_matches.add(match.strip())
-                    
-                    if validated_matches:
-                        manual_results[entity_type] = list(validated_matches)
+        requested = [entity_type for entity_type in self.MANUAL_PATTERNS if entity_type in entities]
+        spans = self.MANUAL_SCANNER.scan(text, requested)
+        for entity_type in requested:
+            matches = [text[start:end] for start, end in spans[entity_type]]
+            if matches:
+                # Validate and deduplicate matches
+                validated_matches = set()  # Use set to deduplicate
+                for match in matches:
+                    if self._validate_entity(entity_type, match):
+                        validated_matches.add(match.strip())
+                
+                if validated_matches:
+                    manual_results[entity_type] = list(validated_matches)
         
         return manual_results
 
@@ -398,102 +780,142 @@ class ParsePii:
             print(f"ParsePii._validate_entity: Error validating {entity_type}: {e}")
             return False
     
-    def extract(self, text="", **kwargs):
+    @staticmethod
+    def _mask_credit_cards(text, entities):
+        """Mask credit card numbers with X when card entities are requested; returns (text, card numbers)."""
+        if "IN_CREDIT_CARD" not in entities and "CREDIT_CARD" not in entities:
+            return text, []
+        cc_regex = re.compile(common.regex_for_credit_card)
+        credit_cards = re.findall(cc_regex, text)
+        return cc_regex.sub(lambda m: 'X' * len(m.group()), text), credit_cards
+
+    def _process_batch(self, texts, entities, batch_size, n_process):
+        """spaCy artifacts for many texts through the NLP engine's nlp.pipe, as (text, artifacts) pairs."""
+        trimmed = self.trimmed_nlp_artifacts(texts, entities, batch_size, n_process)
+        if trimmed is not None:
+            return zip(texts, trimmed)
+        nlp_engine = self.analyzer.nlp_engine
+        try:
+            return nlp_engine.process_batch(texts, language="en", batch_size=batch_size, n_process=n_process)
+        except TypeError:
+            # Older Presidio releases batch through nlp.pipe without exposing its parameters
+            return nlp_engine.process_batch(texts, language="en")
+
+    def extract_batch(self, texts, entities, batch_size=None, n_process=None):
+        """
+        Analyze many documents, running spaCy over them together through nlp.pipe so the model batches
+        across documents, then applying the recognizers to each document's precomputed artifacts.
+
+        Parameters:
+        ---------
+        texts: List of document texts.
+        entities: Entity types to detect.
+        batch_size: nlp.pipe batch size (default common.pii_nlp_batch_size).
+        n_process: nlp.pipe processes (default common.pii_nlp_n_process).
+
+        Return:
+        ------
+        analyses: One analyze_document result per text, in input order.
+        """
+        batch_size = batch_size or common.pii_nlp_batch_size
+        n_process = n_process or common.pii_nlp_n_process
+        artifacts = {}
+        # Pattern-only entity sets never reach spaCy NER (see analyze_text), so there is nothing to batch
+        if self.analyzer is not None and self.needs_ner(entities):
+            # Long texts are chunked by analyze_text instead, so only the rest is batched
+            batched = [
+                index for index, text in enumerate(texts)
+                if isinstance(text, str) and text and len(text) <= common.pii_chunk_chars
+            ]
+            masked_texts = [self._mask_credit_cards(texts[index], entities)[0] for index in batched]
+            try:
+                for index, (_, nlp_artifacts) in zip(batched, self._process_batch(masked_texts, entities, batch_size, n_process)):
+                    artifacts[index] = nlp_artifacts
+                print(f"ParsePii.extract_batch: NLP processed {len(artifacts)} of {len(texts)} documents in batches of {batch_size}")
+            except Exception as exp:
+                print(f"ParsePii.extract_batch: Batch NLP failed, analyzing documents one by one: {exp}")
+                logger.logging.error(f"extract_batch error: {str(exp)}")
+                artifacts = {}
+        return [
+            self.analyze_document(text, entities=entities, nlp_artifacts=artifacts.get(index))
+            for index, text in enumerate(texts)
+        ]
+
+    def analyze_document(self, text="", **kwargs):
+        """
+        Run the analyzer once over a document and return everything the pipeline needs from that pass.
+
+        Parameters:
+        ---------
+        text: Document text, or pass path and fileName to read it from disk.
+        entities: Entity types to detect.
+        nlp_artifacts: spaCy artifacts already computed for the (credit-card masked) text, if any.
+
+        Return:
+        ------
+        analysis: DocumentAnalysis mapping with has_pii ("yes" when the analyzer found anything, as classify
+        reports), counts (entity counter string or "No PII found"), values ({entity type: unique values}, as
+        extract returns), spans (analyzer results as entity_type/start/end/score dictionaries) and categories
+        (values per category). The analyzer results are held as a SpanTable; values and everything derived
+        from them are built on first access.
+        """
         try:
             if self.analyzer is None:
-                print("ParsePii.extract: Analyzer is None, cannot extract")
-                return "No PII found", {}
+                print("ParsePii.analyze_document: Analyzer is None, cannot analyze")
+                return self._empty_analysis()
                 
             entities = kwargs.get("entities", [])
-            print(f"ParsePii.extract: Starting with full text:\n{text}")
-            print(f"ParsePii.extract: Entities: {entities}")
+            print(f"ParsePii.analyze_document: Starting with full text:\n{text}")
+            print(f"ParsePii.analyze_document: Entities: {entities}")
             
             original_text = text
+            credit_cards = []
             
             if "path" in kwargs and "fileName" in kwargs:
                 file_path = os.path.join(kwargs["path"], kwargs["fileName"])
-                print(f"ParsePii.extract: Reading file: {file_path}")
+                print(f"ParsePii.analyze_document: Reading file: {file_path}")
                 with open(file_path, 'r', encoding='utf-8') as open_file:
                     lines = open_file.readlines()
                     text = ' '.join(line.strip() for line in lines)
                     original_text = text
-                    print(f"ParsePii.extract: File full text:\n{text}")
+                    print(f"ParsePii.analyze_document: File full text:\n{text}")
                     
             elif text:
                 # Handle credit card processing
-                if "IN_CREDIT_CARD" in entities or "CREDIT_CARD" in entities:
-                    cc_regex = re.compile(common.regex_for_credit_card)
-                    credit_cards = re.findall(cc_regex, text)
-                    text = cc_regex.sub(lambda m: 'X' * len(m.group()), text)
-                    print(f"ParsePii.extract: Credit cards found: {credit_cards}")
+                text, credit_cards = self._mask_credit_cards(text, entities)
+                if credit_cards:
+                    print(f"ParsePii.analyze_document: Credit cards found: {credit_cards}")
             else:
                 raise Exception("Parameters missing. Pass some text or path & file name as parameters.")
 
             # Use a lower threshold for better detection
-            response = self.analyzer.analyze(correlation_id=0, text=text, entities=entities, language='en')
-            
-            predicted_entities = []
-            predicted_information = {}
-            
-            # Deduplicate entities from analyzer response
-            seen_values = {}  # Track values per entity type to avoid duplicates
-            for item in response:
-                if item.score >= 0.2:
-                    entity_text = original_text[item.start:item.end].strip()
-                    entity_type = item.entity_type
-                    
-                    # Initialize set for entity type if not present
-                    if entity_type not in seen_values:
-                        seen_values[entity_type] = set()
-                    
-                    # Only add unique values
-                    if entity_text not in seen_values[entity_type]:
-                        seen_values[entity_type].add(entity_text)
-                        predicted_entities.append(entity_type)
-                        if entity_type in predicted_information:
-                            predicted_information[entity_type].append(entity_text)
-                        else:
-                            predicted_information[entity_type] = [entity_text]
-                        print(f"ParsePii.extract: Found {entity_type} with score {item.score}: {entity_text}")
+            response = self.analyze_text(text, entities, kwargs.get("nlp_artifacts"))
+            table = SpanTable.from_results(original_text, response)
             
             # Additional manual regex checks for critical entities
             manual_checks = self._manual_entity_extraction(original_text, entities)
-            for entity_type, values in manual_checks.items():
-                if values:
-                    # Deduplicate manual checks
-                    unique_values = list(set(values))  # Convert to set to remove duplicates
-                    print(f"ParsePii.extract: Manual detection found {entity_type}: {unique_values}")
-                    if entity_type in predicted_information:
-                        # Only add values not already detected
-                        for value in unique_values:
-                            if entity_type not in seen_values:
-                                seen_values[entity_type] = set()
-                            if value not in seen_values[entity_type]:
-                                seen_values[entity_type].add(value)
-                                predicted_information[entity_type].append(value)
-                    else:
-                        predicted_information[entity_type] = unique_values
-                        seen_values[entity_type] = set(unique_values)
+            print(f"ParsePii.analyze_document: Analyzer found {len(table)} spans of {table.entity_types}, "
+                  f"manual detection found {list(manual_checks.keys())}")
             
-            print(f"ParsePii.extract: Final detected entities: {list(predicted_information.keys())}")
-            print(f"ParsePii.extract: Final detected information: {predicted_information}")
-            
-            if not predicted_information:
-                print("ParsePii.extract: No PII detected")
-                return "No PII found", predicted_information
-                
-            # Update entity counter to use detected information keys
-            entity_list = []
-            for entity_type, values in predicted_information.items():
-                entity_list.extend([entity_type] * len(values))
-                
             logger.logging.info("Extract PII data from text")
-            return str(self.entity_counter(entity_list)), predicted_information
+            # Masked credit card numbers still count as PII found
+            return DocumentAnalysis(
+                table, "yes" if len(table) or credit_cards else "no", manual_checks, 0.2, self.CATEGORIES
+            )
             
         except Exception as exp:
-            print(f"ParsePii.extract: Error: {traceback.format_exc()}")
+            print(f"ParsePii.analyze_document: Error: {traceback.format_exc()}")
             logger.logging.error(str(exp))
-            return "No PII found", {}
+            return self._empty_analysis()
+
+    def _empty_analysis(self):
+        """DocumentAnalysis of a document that could not be analyzed: no PII, no values."""
+        return DocumentAnalysis(SpanTable.from_results("", []), "no", {}, 0.2, self.CATEGORIES)
+
+    def extract(self, text="", **kwargs):
+        """Entity counter string and {entity type: values} of a document (one analyzer pass)."""
+        analysis = self.analyze_document(text, **kwargs)
+        return analysis["counts"], analysis["values"]
 
     def get_stored_information(self):
         try:
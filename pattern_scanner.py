@@ -0,0 +1,51 @@
+import re
+
+
+class MultiPatternScanner:
+    """
+    A set of named regular expressions scanned together, reporting every match with its pattern id.
+
+    Pattern ids that share the same regex and flags are compiled once and scanned in a single pass,
+    whose spans are reported under each of those ids. Each distinct regex keeps its own pass so the
+    re module's literal-prefix and first-character search still applies to it.
+    """
+
+    def __init__(self, patterns):
+        """
+        Parameters:
+        ---------
+        patterns: Dictionary of pattern id -> (regex, flags).
+        """
+        # (regex, flags) -> compiled regex and the pattern ids it answers for
+        self._passes = {}
+        for pattern_id, (regex, flags) in patterns.items():
+            key = (regex, flags)
+            if key not in self._passes:
+                self._passes[key] = (re.compile(regex, flags), [])
+            self._passes[key][1].append(pattern_id)
+        self.pattern_ids = list(patterns)
+
+    def __contains__(self, pattern_id):
+        return pattern_id in self.pattern_ids
+
+    def scan(self, text, pattern_ids=None):
+        """
+        Parameters:
+        ---------
+        text: Text to scan.
+        pattern_ids: Pattern ids to scan for (default all of them).
+
+        Return:
+        ------
+        spans: Dictionary of pattern id -> list of (start, end) in the order re.finditer reports them.
+        """
+        wanted = set(self.pattern_ids if pattern_ids is None else pattern_ids)
+        spans = {}
+        for compiled, ids in self._passes.values():
+            ids = [pattern_id for pattern_id in ids if pattern_id in wanted]
+            if not ids:
+                continue
+            found = [match.span() for match in compiled.finditer(text)]
+            for pattern_id in ids:
+                spans[pattern_id] = found
+        return spans
@@ -0,0 +1,162 @@
+import gc
+import os
+import signal
+import socket
+import time
+import utils.logger_test as logger
+
+# smaps_rollup fields, in kB, summed into the memory report
+_SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def memory_usage(pid="self"):
+    """
+    Memory of a process from /proc/<pid>/smaps_rollup (Linux), in bytes.
+
+    Return:
+    ------
+    usage: Dictionary with rss, pss, shared and uss (private pages: the memory freed if the process
+    exited), or None when smaps_rollup cannot be read.
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as rollup:
+            for line in rollup:
+                name, _, rest = line.partition(":")
+                if name in _SMAPS_FIELDS:
+                    values[name] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return {
+        "pid": os.getpid() if pid == "self" else pid,
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "shared": values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def _child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            return [int(child) for child in children.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def memory_report():
+    """
+    Memory of the serving processes. In pre-fork mode this is the master and every worker forked from
+    it; otherwise only the current process.
+    """
+    master = int(os.environ.get("PREFORK_MASTER_PID", 0))
+    if not master:
+        return {"mode": "single", "master": None, "workers": [memory_usage()]}
+    workers = [usage for usage in (memory_usage(pid) for pid in _child_pids(master)) if usage is not None]
+    return {
+        "mode": "prefork",
+        "master": memory_usage(master),
+        "workers": workers,
+        "workers_uss": sum(usage["uss"] for usage in workers),
+    }
+
+
+class PreforkServer:
+    """
+    Serve an ASGI app from worker processes forked from a master that has already loaded the models.
+
+    preload() runs in the master before any fork; the loaded objects are then frozen out of the garbage
+    collector so the workers' collections do not write to (and so copy) the pages they live on, and every
+    worker shares them copy-on-write. preload() must not start threads or native thread pools (OpenMP, MKL):
+    a forked child gets none of the parent's threads, only their locks, and can deadlock on them. Engines
+    that need them are loaded by the workers themselves. after_fork() runs first thing in each worker to
+    recreate what cannot cross a fork: locks, thread and process pools, database connections. The master
+    only forks, restarts workers that die and forwards SIGINT/SIGTERM.
+    """
+
+    # Seconds between checks for exited workers
+    REAP_INTERVAL = 0.5
+
+    def __init__(self, app, host, port, workers, preload=None, after_fork=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload
+        self.after_fork = after_fork
+        self.children = set()
+        self.stopping = False
+
+    def _spawn(self, sock):
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return
+        # Worker process
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            if self.after_fork is not None:
+                self.after_fork()
+            import uvicorn
+            server = uvicorn.Server(uvicorn.Config(self.app, host=self.host, port=self.port))
+            server.run(sockets=[sock])
+        except BaseException as e:
+            print(f"PreforkServer: Worker {os.getpid()} failed: {e}")
+            logger.logging.error(f"Prefork worker error: {str(e)}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.discard(pid)
+
+    def run(self):
+        if self.preload is not None:
+            self.preload()
+        # Everything loaded so far is long-lived: keep the collector from touching it in the workers
+        gc.collect()
+        gc.freeze()
+        master = memory_usage()
+        if master is not None:
+            print(f"PreforkServer: Master {os.getpid()} loaded models, uss={master['uss'] // (1024 * 1024)} MB")
+        os.environ["PREFORK_MASTER_PID"] = str(os.getpid())
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        for _ in range(self.workers):
+            self._spawn(sock)
+        print(f"PreforkServer: Serving on {self.host}:{self.port} with {self.workers} workers")
+        logger.logging.info(f"Prefork serving started with {self.workers} workers")
+
+        while self.children:
+            # Only reap our own workers: os.wait() would also collect the children of libraries running in
+            # the master (process pool workers, the multiprocessing resource tracker)
+            for pid in list(self.children):
+                try:
+                    reaped, status = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    reaped, status = pid, 0
+                if not reaped:
+                    continue
+                self.children.discard(pid)
+                if not self.stopping:
+                    print(f"PreforkServer: Worker {pid} exited with status {status}, restarting")
+                    logger.logging.error(f"Prefork worker {pid} exited with status {status}")
+                    # Do not spin when a worker dies on startup
+                    time.sleep(1)
+                    self._spawn(sock)
+            time.sleep(self.REAP_INTERVAL)
+        sock.close()
@@ -0,0 +1,197 @@
+from collections.abc import Mapping
+import numpy as np
+import utils.logger_test as logger
+
+
+class SpanTable:
+    """
+    Analyzer results of one document as parallel arrays: start, end, entity type id (an index into
+    entity_types) and score per span. Span text is only sliced out of the document when values are
+    asked for.
+    """
+
+    def __init__(self, text, entity_types, type_ids, starts, ends, scores):
+        self.text = text
+        self.entity_types = entity_types
+        self.type_ids = type_ids
+        self.starts = starts
+        self.ends = ends
+        self.scores = scores
+
+    @classmethod
+    def from_results(cls, text, results):
+        """Table of a list of RecognizerResult whose offsets point into text."""
+        entity_types = {}
+        count = len(results)
+        type_ids = np.fromiter(
+            (entity_types.setdefault(item.entity_type, len(entity_types)) for item in results), dtype=np.int32, count=count
+        )
+        starts = np.fromiter((item.start for item in results), dtype=np.int64, count=count)
+        ends = np.fromiter((item.end for item in results), dtype=np.int64, count=count)
+        scores = np.fromiter((item.score for item in results), dtype=np.float64, count=count)
+        return cls(text, list(entity_types), type_ids, starts, ends, scores)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def spans(self):
+        """The spans as entity_type/start/end/score dictionaries."""
+        return [
+            {"entity_type": self.entity_types[type_id], "start": int(start), "end": int(end), "score": float(score)}
+            for type_id, start, end, score in zip(self.type_ids, self.starts, self.ends, self.scores)
+        ]
+
+    def values(self, min_score):
+        """
+        Unique stripped text of the spans scoring at least min_score, as {entity type: values} in order of
+        first appearance. Repeated (type, start, end) spans are dropped before any text is sliced.
+        """
+        keep = np.flatnonzero(self.scores >= min_score)
+        if not len(keep):
+            return {}
+        keys = np.column_stack((self.type_ids[keep], self.starts[keep], self.ends[keep]))
+        _, first = np.unique(keys, axis=0, return_index=True)
+        values = {}
+        seen = {}
+        for index in keep[np.sort(first)]:
+            entity_type = self.entity_types[self.type_ids[index]]
+            value = self.text[self.starts[index]:self.ends[index]].strip()
+            seen_values = seen.setdefault(entity_type, set())
+            if value not in seen_values:
+                seen_values.add(value)
+                values.setdefault(entity_type, []).append(value)
+        return values
+
+
+class DocumentAnalysis(Mapping):
+    """
+    Result of ParsePii.analyze_document, read like a dictionary with has_pii, counts, values, spans and
+    categories. Only has_pii is known up front: values (the table's values merged with the manual regex
+    matches), the counts and categories derived from them, and the span dictionaries are built on first
+    access. A builder that fails logs the error and yields an empty result, as analyze_document does.
+    """
+
+    KEYS = ("has_pii", "counts", "values", "spans", "categories")
+
+    def __init__(self, table, has_pii, manual_values, min_score, categories):
+        """
+        Parameters:
+        ---------
+        table: SpanTable of the analyzer results.
+        has_pii: "yes" or "no".
+        manual_values: {entity type: values} from the manual regex checks.
+        min_score: Lowest analyzer score whose spans count as values.
+        categories: Ordered {category name: set of entity types}; other types count as "Other".
+        """
+        self.table = table
+        self.has_pii = has_pii
+        self.manual_values = manual_values
+        self.min_score = min_score
+        self.category_sets = categories
+        self._values = None
+        self._counts = None
+        self._spans = None
+        self._categories = None
+
+    def __getitem__(self, key):
+        if key == "has_pii":
+            return self.has_pii
+        if key == "values":
+            return self.values()
+        if key == "counts":
+            return self.counts()
+        if key == "spans":
+            return self.spans()
+        if key == "categories":
+            return self.categories()
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    @staticmethod
+    def _failed(name, error):
+        print(f"DocumentAnalysis: Failed to build {name}: {error}")
+        logger.logging.error(f"DocumentAnalysis {name} error: {str(error)}")
+
+    def spans(self):
+        if self._spans is None:
+            try:
+                self._spans = self.table.spans()
+            except Exception as e:
+                self._failed("spans", e)
+                self._spans = []
+        return self._spans
+
+    def values(self):
+        if self._values is None:
+            try:
+                values = self.table.values(self.min_score)
+                for entity_type, manual in self.manual_values.items():
+                    if not manual:
+                        continue
+                    unique_values = list(set(manual))
+                    if entity_type in values:
+                        # Only add values not already detected
+                        detected = set(values[entity_type])
+                        values[entity_type].extend(value for value in unique_values if value not in detected)
+                    else:
+                        values[entity_type] = unique_values
+            except Exception as e:
+                self._failed("values", e)
+                values = {}
+            self._values = values
+        return self._values
+
+    def _value_counts(self):
+        """Entity types and their number of values, as parallel arrays."""
+        values = self.values()
+        entity_types = np.array(list(values), dtype=object)
+        counts = np.fromiter((len(found) for found in values.values()), dtype=np.int64, count=len(values))
+        return entity_types, counts
+
+    def counts(self):
+        """Entity counter string ("TYPE:n, ..." sorted by type), or "No PII found"."""
+        if self._counts is None:
+            try:
+                entity_types, counts = self._value_counts()
+                if not counts.sum():
+                    self._counts = "No PII found"
+                else:
+                    order = np.argsort(entity_types.astype(str), kind="stable")
+                    self._counts = ", ".join(
+                        f"{entity_types[index]}:{counts[index]}" for index in order if counts[index]
+                    )
+            except Exception as e:
+                self._failed("counts", e)
+                self._counts = "No PII found"
+        return self._counts
+
+    @staticmethod
+    def _category_codes(category_sets, entity_types):
+        """Index into the category names of each entity type, the last code ("Other") for unlisted types."""
+        other = len(category_sets)
+        return np.fromiter(
+            (
+                next((code for code, members in enumerate(category_sets.values()) if entity_type in members), other)
+                for entity_type in entity_types
+            ),
+            dtype=np.int64,
+            count=len(entity_types),
+        )
+
+    def categories(self):
+        """Number of values per category, summed with one bincount over the entity types."""
+        if self._categories is None:
+            names = list(self.category_sets) + ["Other"]
+            try:
+                entity_types, counts = self._value_counts()
+                totals = np.bincount(self._category_codes(self.category_sets, entity_types), weights=counts, minlength=len(names))
+                self._categories = {name: int(total) for name, total in zip(names, totals)}
+            except Exception as e:
+                self._failed("categories", e)
+                self._categories = {name: 0 for name in names}
+        return self._categories
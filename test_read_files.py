@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+import read_files
+from utils import common
+
+
+def _read_txt(path):
+    return " ".join(read_files._iter_txt_pieces(str(path), common.txt_chunk_chars))
+
+
+def test_txt_latin1_after_ascii_prefix_keeps_accents(tmp_path):
+    # ASCII for the whole sniffed prefix, so the file is sniffed as UTF-8 before the Latin-1 bytes show up
+    prefix = "plain ascii words " * (common.txt_sniff_bytes // 18 + 1)
+    path = tmp_path / "mixed.txt"
+    path.write_bytes(prefix.encode("ascii") + "café crème brûlée".encode("latin-1"))
+
+    text = _read_txt(path)
+
+    assert text.endswith("café crème brûlée")
+    assert text.count("plain ascii words") == prefix.count("plain ascii words")
+
+
+def test_txt_utf8_split_across_chunks_is_decoded(tmp_path):
+    path = tmp_path / "utf8.txt"
+    path.write_bytes(("naïve café " * (common.txt_chunk_chars // 5)).encode("utf-8"))
+
+    text = _read_txt(path)
+
+    assert "�" not in text
+    assert set(text.split()) == {"naïve", "café"}
+
+
+@pytest.mark.parametrize("width, height", [(2121, 3000), (2001, 2001), (1932, 2500), (5000, 700)])
+def test_tile_boxes_are_evenly_spaced_with_exact_overlap(width, height):
+    tile_size, overlap = 2000, 128
+    tiles = read_files._tile_boxes(width, height, tile_size, overlap)
+    lefts = sorted({box[0] for box, _ in tiles})
+    tops = sorted({box[1] for box, _ in tiles})
+
+    assert len(tiles) == len(lefts) * len(tops)
+    for starts, length in ((lefts, width), (tops, height)):
+        # Fewest tiles of at most tile_size that overlap by overlap pixels and cover the side
+        assert len(starts) == max(1, -(-(length - overlap) // (tile_size - overlap)))
+    for box, _ in tiles:
+        assert box[2] - box[0] <= tile_size and box[3] - box[1] <= tile_size
+        assert box[2] <= width and box[3] <= height
+        right_neighbour = [other for other, _ in tiles if other[1] == box[1] and other[0] > box[0]]
+        if right_neighbour:
+            assert box[2] - min(right_neighbour)[0] == overlap
+        below = [other for other, _ in tiles if other[0] == box[0] and other[1] > box[1]]
+        if below:
+            assert box[3] - min(below, key=lambda other: other[1])[1] == overlap
+    assert max(box[2] for box, _ in tiles) == width and max(box[3] for box, _ in tiles) == height
+
+
+def test_tile_boxes_leave_images_within_tile_size_whole():
+    assert read_files._tile_boxes(2000, 1500, 2000, 128) == [((0, 0, 2000, 1500), (0, 0, 2000, 1500))]
+
+
+def test_tile_keep_regions_partition_the_image():
+    width, height = 2121, 3000
+    owners = np.zeros((height, width), dtype=np.int32)
+    for box, keep in read_files._tile_boxes(width, height, 2000, 128):
+        left, top, right, bottom = keep[0] + box[0], keep[1] + box[1], keep[2] + box[0], keep[3] + box[1]
+        assert box[0] <= left < right <= box[2] and box[1] <= top < bottom <= box[3]
+        owners[top:bottom, left:right] += 1
+
+    assert (owners == 1).all()
+
+
+class _BlockOcr:
+    """Stand-in OCR engine: every rectangle of one non-zero gray value is a text line reading "w<value>"."""
+
+    def text_detector(self, image):
+        boxes = []
+        for value in np.unique(image[:, :, 0]):
+            if value == 0:
+                continue
+            ys, xs = np.nonzero(image[:, :, 0] == value)
+            x0, y0, x1, y1 = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+            boxes.append(np.float32([[x0, y0], [x1, y0], [x1, y1], [x0, y1]]))
+        return boxes, 0.0
+
+    def text_recognizer(self, crops):
+        return [(f"w{int(np.median(crop))}", 0.99) for crop in crops], 0.0
+
+
+def test_ocr_batch_reads_text_in_tile_overlaps_once():
+    width, height, tile_size, overlap = 2600, 2400, 1000, 128
+    page = np.zeros((height, width, 3), dtype=np.uint8)
+    tiles = read_files._tile_boxes(width, height, tile_size, overlap)
+    lines = {}
+    value = 1
+    # Short lines on both sides of every seam, inside the overlap bands, plus one away from any seam
+    seams_x = sorted({box[0] for box, _ in tiles} - {0})
+    seams_y = sorted({box[1] for box, _ in tiles} - {0})
+    anchors = [(x + offset, 300) for x in seams_x for offset in (-20, 40, 100)]
+    anchors += [(300, y + offset) for y in seams_y for offset in (-20, 40, 100)]
+    anchors += [(x + 60, y + 60) for x in seams_x for y in seams_y] + [(500, 500)]
+    for x, y in anchors:
+        page[y:y + 12, x:x + 24] = value
+        lines[f"w{value}"] = (x, y)
+        value += 1
+
+    crops = [np.ascontiguousarray(page[top:bottom, left:right]) for (left, top, right, bottom), _ in tiles]
+    results = read_files._ocr_batch(_BlockOcr(), crops, use_cls=False, regions=[keep for _, keep in tiles])
+    words = " ".join(text for text, _, _ in results).split()
+
+    assert sorted(words) == sorted(lines)